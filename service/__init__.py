@@ -39,8 +39,11 @@ app.config.from_object(config)
 # Dependencies require we import the routes AFTER the Flask app is created
 # pylint: disable=wrong-import-position, wrong-import-order, cyclic-import
 from service import routes, models        # noqa: F401, E402
+from service.cache import cache  # noqa: F401, E402
 from service.common import error_handlers, cli_commands  # noqa: F401, E402
 
+app.register_blueprint(routes.products_bp)
+
 # Set up logging for production
 log_handlers.init_logging(app, "gunicorn.error")
 
@@ -55,4 +58,6 @@ except Exception as error:  # pylint: disable=broad-except
     # gunicorn requires exit code 4 to stop spawning workers when they die
     sys.exit(4)
 
+cache.init_app(app)
+
 app.logger.info("Service initialized!")
@@ -0,0 +1,183 @@
+######################################################################
+# Copyright 2016, 2022 John J. Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Product Cache
+
+Read-through cache for serialized Products
+
+A small in-process dictionary (L1) answers repeated lookups without leaving
+the worker. When REDIS_URI is configured, Redis (L2) is shared by all of the
+workers so a miss in one worker can still be served without the database.
+Values are the JSON bytes of a serialized Product.
+
+Every delete() bumps a version, so a reader that looked the Product up
+before a concurrent write cannot store the old bytes afterwards: read the
+version() before the database lookup and pass it to set(). In Redis the
+version is a per-Product counter; in-process it is one counter for all
+Products.
+
+With Redis, an L1 hit is only served after the Redis version still
+matches the version it was stored with, so a write in one worker is seen
+by the L1 of every other worker. The version keys expire after a day or
+CACHE_TTL, whichever is longer, long after any request that read them.
+"""
+import logging
+import time
+from collections import OrderedDict
+import redis
+
+logger = logging.getLogger("flask.app")
+
+# Seconds a version key outlives the last write of its Product
+VERSION_TTL = 24 * 60 * 60
+
+
+def product_key(product_id) -> str:
+    """Returns the cache key for a Product id"""
+    return f"product:{product_id}"
+
+
+def version_key(product_id) -> str:
+    """Returns the key of the version counter for a Product id"""
+    return f"product:{product_id}:v"
+
+
+class ProductCache:
+    """Two level cache of serialized Products"""
+
+    def __init__(self):
+        self.ttl = 300
+        self.local_ttl = 5
+        self.local_size = 1024
+        self._local = OrderedDict()
+        self._generation = 0
+        self._redis = None
+
+    def init_app(self, app):
+        """Initializes the cache from the Flask app configuration
+
+        :param app: the Flask app
+        :type app: Flask
+
+        """
+        self.ttl = app.config.get("CACHE_TTL", self.ttl)
+        self.local_ttl = app.config.get("CACHE_LOCAL_TTL", self.local_ttl)
+        self.local_size = app.config.get("CACHE_LOCAL_SIZE", self.local_size)
+        self._local.clear()
+        redis_uri = app.config.get("REDIS_URI")
+        if redis_uri:
+            logger.info("Initializing cache with Redis")
+            self._redis = redis.Redis.from_url(redis_uri)
+        else:
+            logger.info("Initializing cache without Redis")
+            self._redis = None
+
+    def get(self, product_id):
+        """Returns the serialized Product or None on a cache miss"""
+        key = product_key(product_id)
+        entry = self._local.get(key)
+        if entry:
+            data, expires, redis_version = entry
+            if expires > time.monotonic():
+                if not self._redis:
+                    return data
+                # another worker may have changed the Product since
+                try:
+                    if self._redis.get(version_key(product_id)) == redis_version:
+                        return data
+                except redis.RedisError as error:
+                    logger.warning("Cache unavailable: %s", error)
+                    return None
+            self._local.pop(key, None)
+        if not self._redis:
+            return None
+        try:
+            data, redis_version = self._redis.mget(key, version_key(product_id))
+        except redis.RedisError as error:
+            logger.warning("Cache unavailable: %s", error)
+            return None
+        if data is not None:
+            self._set_local(key, data, redis_version)
+        return data
+
+    def version(self, product_id):
+        """Returns the version to pass to set(), or None if Redis is down
+
+        Read it before the Product is looked up in the database
+        """
+        redis_version = None
+        if self._redis:
+            try:
+                redis_version = self._redis.get(version_key(product_id))
+            except redis.RedisError as error:
+                logger.warning("Cache unavailable: %s", error)
+                return None
+        return (self._generation, redis_version)
+
+    def set(self, product_id, data: bytes, version):
+        """Stores a serialized Product unless it changed since version()"""
+        if version is None:
+            return
+        generation, redis_version = version
+        key = product_key(product_id)
+        if self._redis:
+            try:
+                with self._redis.pipeline() as pipe:
+                    # the transaction fails if delete() bumps the version
+                    pipe.watch(version_key(product_id))
+                    if pipe.get(version_key(product_id)) != redis_version:
+                        return
+                    pipe.multi()
+                    pipe.setex(key, self.ttl, data)
+                    pipe.execute()
+            except redis.WatchError:
+                return
+            except redis.RedisError as error:
+                logger.warning("Cache unavailable: %s", error)
+        if generation == self._generation:
+            self._set_local(key, data, redis_version)
+
+    def delete(self, product_id):
+        """Removes a Product from the cache and bumps its version"""
+        key = product_key(product_id)
+        self._generation += 1
+        self._local.pop(key, None)
+        if not self._redis:
+            return
+        try:
+            with self._redis.pipeline() as pipe:
+                pipe.incr(version_key(product_id))
+                pipe.expire(version_key(product_id), max(self.ttl, VERSION_TTL))
+                pipe.delete(key)
+                pipe.execute()
+        except redis.RedisError as error:
+            logger.warning("Cache unavailable: %s", error)
+
+    def clear(self):
+        """Removes all Products from the in-process cache"""
+        self._local.clear()
+
+    def _set_local(self, key: str, data: bytes, redis_version):
+        """Stores an entry in the bounded in-process cache"""
+        self._local[key] = (data, time.monotonic() + self.local_ttl, redis_version)
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_size:
+            self._local.popitem(last=False)
+
+
+# The cache shared by all of the routes
+cache = ProductCache()
@@ -2,7 +2,7 @@
 Flask CLI Command Extensions
 """
 from service import app
-from service.models import db
+from service.models import db, Product
 
 
 ######################################################################
@@ -18,3 +18,17 @@ def db_create():
     db.drop_all()
     db.create_all()
     db.session.commit()
+
+
+######################################################################
+# Command to add new indexes to existing tables without losing data
+# Usage: flask db-create-indexes
+######################################################################
+@app.cli.command("db-create-indexes")
+def db_create_indexes():
+    """
+    Creates the indexes of the Product table that do not exist yet.
+    db.create_all() only creates them together with a new table.
+    """
+    for index in Product.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
@@ -18,3 +18,9 @@ SQLALCHEMY_TRACK_MODIFICATIONS = False
 # Secret for session management
 SECRET_KEY = os.getenv("SECRET_KEY", "sup3r-s3cr3t")
 LOGGING_LEVEL = logging.INFO
+
+# Configure the Product cache (Redis is optional)
+REDIS_URI = os.getenv("REDIS_URI")
+CACHE_TTL = int(os.getenv("CACHE_TTL", "300"))
+CACHE_LOCAL_TTL = int(os.getenv("CACHE_LOCAL_TTL", "5"))
+CACHE_LOCAL_SIZE = int(os.getenv("CACHE_LOCAL_SIZE", "1024"))
@@ -31,8 +31,11 @@ available (boolean) - True for products that are available for adoption
 import logging
 from enum import Enum
 from decimal import Decimal
+import orjson
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import cast, func, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 
 logger = logging.getLogger("flask.app")
 
@@ -60,6 +63,10 @@ class Category(Enum):
     TOOLS = 5
 
 
+# Categories by their name, built once instead of looked up with getattr()
+CATEGORIES_BY_NAME = {category.name: category for category in Category}
+
+
 class Product(db.Model):
     """
     Class that represents a Product
@@ -79,6 +86,11 @@ class Product(db.Model):
     category = db.Column(
         db.Enum(Category), nullable=False, server_default=(Category.UNKNOWN.name)
     )
+    # Indexes for the filters of the list endpoint
+    __table_args__ = (
+        db.Index("ix_product_cat_avail", category, available),
+        db.Index("ix_product_lower_name", func.lower(name)),
+    )
 
     ##################################################
     # INSTANCE METHODS
@@ -128,32 +140,95 @@ class Product(db.Model):
         Deserializes a Product from a dictionary
         Args:
             data (dict): A dictionary containing the Product data
+        """
+        for key, value in self.validate(data).items():
+            setattr(self, key, value)
+        return self
+
+    ##################################################
+    # CLASS METHODS
+    ##################################################
+
+    @classmethod
+    def validate(cls, data: dict) -> dict:
+        """Validates a dictionary of Product data
+
+        :param data: A dictionary containing the Product data
+        :type data: dict
+
+        :return: the column values of the Product
+        :rtype: dict
+
         """
         try:
-            self.name = data["name"]
-            self.description = data["description"]
-            self.price = Decimal(data["price"])
-            if isinstance(data["available"], bool):
-                self.available = data["available"]
-            else:
+            if not isinstance(data["available"], bool):
                 raise DataValidationError(
                     "Invalid type for boolean [available]: "
                     + str(type(data["available"]))
                 )
-            self.category = getattr(Category, data["category"])  # create enum from string
-        except AttributeError as error:
-            raise DataValidationError("Invalid attribute: " + error.args[0]) from error
+            category = CATEGORIES_BY_NAME.get(data["category"])  # create enum from string
+            if category is None:
+                raise DataValidationError("Invalid attribute: " + str(data["category"]))
+            return {
+                "name": data["name"],
+                "description": data["description"],
+                "price": Decimal(data["price"]),
+                "available": data["available"],
+                "category": category
+            }
         except KeyError as error:
             raise DataValidationError("Invalid product: missing " + error.args[0]) from error
         except TypeError as error:
             raise DataValidationError(
                 "Invalid product: body of request contained bad or no data " + str(error)
             ) from error
-        return self
 
-    ##################################################
-    # CLASS METHODS
-    ##################################################
+    @classmethod
+    def create_from_dict(cls, data: dict):
+        """Creates a Product in the database from a dictionary
+
+        :param data: A dictionary containing the Product data
+        :type data: dict
+
+        :return: the new Product
+        :rtype: Product
+
+        """
+        product = cls(**cls.validate(data))
+        logger.info("Creating %s", product.name)
+        db.session.add(product)
+        db.session.commit()
+        return product
+
+    @classmethod
+    def update_from_dict(cls, product_id: int, data: dict):
+        """Updates a Product in the database with a single UPDATE statement
+
+        :param product_id: the id of the Product to update
+        :type product_id: int
+        :param data: A dictionary containing the Product data
+        :type data: dict
+
+        :return: the updated Product, or None if not found
+        :rtype: Product
+
+        """
+        try:
+            values = cls.validate(data)
+        except DataValidationError:
+            # a missing Product is reported before an invalid body
+            if cls.find(product_id) is None:
+                return None
+            raise
+        logger.info("Saving %s", values["name"])
+        product = db.session.execute(
+            update(cls).where(cls.id == product_id).values(**values).returning(cls)
+        ).scalar_one_or_none()
+        if product is not None:
+            # commit would expire the RETURNING values and reload them
+            db.session.expunge(product)
+        db.session.commit()
+        return product
 
     @classmethod
     def init_db(cls, app: Flask):
@@ -169,12 +244,59 @@ class Product(db.Model):
         app.app_context().push()
         db.create_all()  # make our sqlalchemy tables
 
+    @classmethod
+    def bulk_create(cls, products: list):
+        """Creates many Products in the database with a single commit
+
+        :param products: the Products to create
+        :type products: list
+
+        """
+        logger.info("Creating %s Products", len(products))
+        for product in products:
+            # id must be none to generate next primary key
+            product.id = None
+        db.session.bulk_save_objects(products, return_defaults=True)
+        db.session.commit()
+
     @classmethod
     def all(cls) -> list:
         """Returns all of the Products in the database"""
         logger.info("Processing all Products")
         return cls.query.all()
 
+    @classmethod
+    def serialize_all(cls, query) -> bytes:
+        """Serializes the Products of a query into a JSON array
+
+        On PostgreSQL the array is built by the database with json_agg()
+        so no Product objects have to be loaded
+
+        :param query: the query of the Products to serialize
+        :type query: Query
+
+        :return: the JSON array, or None if the query has no Products
+        :rtype: bytes
+
+        """
+        logger.info("Processing serialization of Products")
+        if db.engine.dialect.name == "postgresql":
+            product = func.json_build_object(
+                "id", cls.id,
+                "name", cls.name,
+                "description", cls.description,
+                "price", cast(cls.price, db.String),
+                "available", cls.available,
+                "category", cast(cls.category, db.String)
+            )
+            data = query.with_entities(
+                cast(func.json_agg(aggregate_order_by(product, cls.id)), db.Text)
+            ).scalar()
+            return data.encode("utf-8") if data else None
+        # load the Products in batches instead of all at once
+        products = [product.serialize() for product in query.order_by(cls.id).yield_per(200)]
+        return orjson.dumps(products) if products else None
+
     @classmethod
     def find(cls, product_id: int):
         """Finds a Product by it's ID
@@ -187,11 +309,12 @@ class Product(db.Model):
 
         """
         logger.info("Processing lookup for id %s ...", product_id)
-        return cls.query.get(product_id)
+        # the identity map is checked before the database is queried
+        return db.session.get(cls, product_id)
 
     @classmethod
     def find_by_name(cls, name: str) -> list:
-        """Returns all Products with the given name
+        """Returns all Products with the given name, ignoring case
 
         :param name: the name of the Products you want to match
         :type name: str
@@ -201,7 +324,8 @@ class Product(db.Model):
 
         """
         logger.info("Processing name query for %s ...", name)
-        return cls.query.filter(cls.name == name)
+        # lower() on both sides lets the database use ix_product_lower_name
+        return cls.query.filter(func.lower(cls.name) == name.lower())
 
     @classmethod
     def find_by_price(cls, price: Decimal) -> list:
@@ -18,13 +18,21 @@
 """
 Product Store Service with UI
 """
-from flask import jsonify, request, abort
+import hashlib
+import orjson
+from flask import Blueprint, jsonify, request, abort
 from flask import url_for  # noqa: F401 pylint: disable=unused-import
-from service.models import Product, Category
+from service.models import Product, CATEGORIES_BY_NAME
 from service.common import status  # HTTP Status Codes
+from service.cache import cache
 # from urllib.parse import quote_plus
 from . import app
-import logging
+
+# Query string values that mean True for the available filter
+TRUTHY_VALUES = frozenset({"true", "yes", "1", "t", "y", "on"})
+
+# The Product endpoints, registered on the app in service/__init__.py
+products_bp = Blueprint("products", __name__)
 
 
 ######################################################################
@@ -50,27 +58,42 @@ def index():
 ######################################################################
 def check_content_type(content_type):
     """Checks that the media type is correct"""
-    if "Content-Type" not in request.headers:
-        app.logger.error("No Content-Type specified.")
-        abort(
-            status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
-            f"Content-Type must be {content_type}",
-        )
-
-    if request.headers["Content-Type"] == content_type:
+    # mimetype is parsed once by Werkzeug and ignores parameters like charset
+    if request.mimetype == content_type:
         return
 
-    app.logger.error("Invalid Content-Type: %s", request.headers["Content-Type"])
+    app.logger.error("Invalid Content-Type: %s", request.headers.get("Content-Type"))
     abort(
         status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
         f"Content-Type must be {content_type}",
     )
 
 
+def json_response(data: bytes, status_code: int = status.HTTP_200_OK, headers=None):
+    """Returns already serialized JSON data without going through jsonify
+
+    The data must be bytes, not a generator, so that the response gets a
+    Content-Length header instead of a chunked body
+    """
+    return app.response_class(data, status=status_code, headers=headers, mimetype="application/json")
+
+
+def conditional_response(data: bytes):
+    """Returns the JSON data with an ETag, or 304 if the client has it already"""
+    etag = hashlib.blake2b(data, digest_size=16).hexdigest()
+    # If-None-Match uses the weak comparison, W/"tag" matches "tag"
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = json_response(data)
+    response.set_etag(etag)
+    return response
+
+
 ######################################################################
 # C R E A T E   A   N E W   P R O D U C T
 ######################################################################
-@app.route("/products", methods=["POST"])
+@products_bp.route("/products", methods=["POST"])
 def create_products():
     """
     Creates a Product
@@ -81,9 +104,7 @@ def create_products():
 
     data = request.get_json()
     app.logger.info("Processing: %s", data)
-    product = Product()
-    product.deserialize(data)
-    product.create()
+    product = Product.create_from_dict(data)
     app.logger.info("Product with new id [%s] saved!", product.id)
 
     message = product.serialize()
@@ -91,9 +112,9 @@ def create_products():
     #
     # Uncomment this line of code once you implement READ A PRODUCT
     #
-    location_url = url_for("get_products", product_id=product.id, _external=True)
+    location_url = url_for(".get_products", product_id=product.id, _external=True)
     # location_url = "/"  # delete once READ is implemented
-    return jsonify(message), status.HTTP_201_CREATED, {"Location": location_url}
+    return json_response(orjson.dumps(message), status.HTTP_201_CREATED, {"Location": location_url})
 
 
 ######################################################################
@@ -102,14 +123,13 @@ def create_products():
 
 #
 # PLACE YOUR CODE TO LIST ALL PRODUCTS HERE
-@app.route("/products", methods=["GET"])
+@products_bp.route("/products", methods=["GET"])
 def list_products():
     """
     Listes Products
     This endpoint will list all or filtered Products of the db
     """
     app.logger.info("Request to Retrieve products...")
-    found_products = []
     available = request.args.get("available")
     category = request.args.get("category")
     name = request.args.get("name")
@@ -117,7 +137,7 @@ def list_products():
     # list products by availability
     if available:
         app.logger.info("... with given availibility")
-        available_value = available.lower() in ["true", "yes", 1]
+        available_value = available.lower() in TRUTHY_VALUES
         found_products = Product.find_by_availability(available_value)
     # list products by name
     elif name:
@@ -126,20 +146,26 @@ def list_products():
     # list products by category
     elif category:
         app.logger.info("... with given category")
-        category_value = getattr(Category, category.upper())  # like deserialize
+        category_value = CATEGORIES_BY_NAME.get(category.upper())
+        if category_value is None:
+            abort(status.HTTP_400_BAD_REQUEST, f"Unknown category '{category}'")
         found_products = Product.find_by_category(category_value)
     # unimplemented filter criteria = list all
     else:
         app.logger.info("... all products")
-        found_products = Product.all()
+        found_products = Product.query
+    # serialized by the database in one query
+    data = Product.serialize_all(found_products)
+    # a filter that matches nothing is an empty list, not 204
+    if not data and (available or name or category):
+        app.logger.info("No such product in database")
+        return json_response(b"[]")
     # nothing found
-    if not found_products:
+    if not data:
         app.logger.info("No (such) product in database")
         return '', status.HTTP_204_NO_CONTENT
-    result = [product.serialize() for product in found_products]
-    logging.info("found products= ** %s **", len(result))
-    app.logger.info("%s Products returned", len(result))
-    return result, status.HTTP_200_OK
+    app.logger.info("Products returned")
+    return conditional_response(data)
 
 
 ######################################################################
@@ -147,19 +173,24 @@ def list_products():
 ######################################################################
 
 # PLACE YOUR CODE HERE TO READ A PRODUCT
-@app.route("/products/<product_id>", methods=["GET"])
+@products_bp.route("/products/<int:product_id>", methods=["GET"])
 def get_products(product_id):
     """
     Retrieve a single Product
     This endpoint will return a Product from the db found by id
     """
     app.logger.info("Request to Retrieve a product with id[%s]", product_id)
-    product = Product.find(product_id)
-    if not product:
-        abort(status.HTTP_404_NOT_FOUND,
-              f"Product with id '{product_id}' was not found.")
-    app.logger.info("Returning product: %s", product.name)
-    return product.serialize(), status.HTTP_200_OK
+    data = cache.get(product_id)
+    if data is None:
+        # a write between the lookup and set() changes the version
+        version = cache.version(product_id)
+        product = Product.find(product_id)
+        if not product:
+            abort(status.HTTP_404_NOT_FOUND,
+                  f"Product with id '{product_id}' was not found.")
+        data = orjson.dumps(product.serialize())
+        cache.set(product.id, data, version)
+    return conditional_response(data)
 
 
 ######################################################################
@@ -167,7 +198,7 @@ def get_products(product_id):
 ######################################################################
 
 # PLACE YOUR CODE TO UPDATE A PRODUCT HERE
-@app.route("/products/<product_id>", methods=["PUT"])
+@products_bp.route("/products/<int:product_id>", methods=["PUT"])
 def update_product(product_id):
     """
     Update a single Product
@@ -176,15 +207,12 @@ def update_product(product_id):
     app.logger.info("Request to Update a product with id[%s]", product_id)
     check_content_type("application/json")
 
-    product = Product.find(product_id)
+    product = Product.update_from_dict(product_id, request.get_json())
     if not product:
         abort(status.HTTP_404_NOT_FOUND,
               f"Product with id '{product_id}' was not found.")
-        # implement create
-    product.deserialize(request.get_json())
-    product.id = product_id
-    product.update()
-    return product.serialize(), status.HTTP_200_OK
+    cache.delete(product.id)
+    return json_response(orjson.dumps(product.serialize()))
 
 
 ######################################################################
@@ -192,7 +220,7 @@ def update_product(product_id):
 ######################################################################
 
 # PLACE YOUR CODE TO DELETE A PRODUCT HERE
-@app.route("/products/<product_id>", methods=["DELETE"])
+@products_bp.route("/products/<int:product_id>", methods=["DELETE"])
 def delete_product(product_id):
     """
     Delete a single Product
@@ -202,5 +230,6 @@ def delete_product(product_id):
     product = Product.find(product_id)
     if product:
         product.delete()
+        cache.delete(product.id)
         app.logger.info("%s has been deleted.", product_id)
     return '', status.HTTP_204_NO_CONTENT
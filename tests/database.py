@@ -0,0 +1,78 @@
+"""
+Test Case base class for tests that use the database
+
+Every test class runs in one outer transaction that is never committed,
+and every test runs in a SAVEPOINT that is rolled back when it ends. The
+session is bound to that connection with join_transaction_mode set to
+"create_savepoint", so a commit made by the service only releases a
+savepoint of its own and nothing is written to disk between tests.
+"""
+import logging
+from unittest import TestCase
+from sqlalchemy import event, text
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import StaticPool
+from service import app
+from service.models import db, init_db, Product
+from tests import DATABASE_URI
+
+
+class DatabaseTestCase(TestCase):
+    """Base class for tests that roll back their changes to the database"""
+
+    # the schema is created once per test process, not once per class
+    db_initialized = False
+
+    @classmethod
+    def setUpClass(cls):
+        """Run once before all tests"""
+        app.config["TESTING"] = True
+        app.config["DEBUG"] = False
+        app.logger.setLevel(logging.CRITICAL)
+        if not DatabaseTestCase.db_initialized:
+            # Set up the test database
+            app.config["SQLALCHEMY_DATABASE_URI"] = DATABASE_URI
+            # the tests run one after another on a single connection, so it is
+            # neither pooled nor pinged before it is used
+            engine_options = {"poolclass": StaticPool, "pool_pre_ping": False}
+            if DATABASE_URI.startswith("sqlite"):
+                # share the one connection, a new one would see an empty database
+                engine_options["connect_args"] = {"check_same_thread": False}
+            app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options
+            init_db(app)
+            DatabaseTestCase.db_initialized = True
+        # run all tests in one transaction that is never committed
+        cls.connection = db.engine.connect()
+        if cls.connection.dialect.name == "sqlite":
+            # pysqlite starts transactions on its own and would commit the
+            # outer transaction, so let SQLAlchemy emit BEGIN instead
+            cls.connection.connection.driver_connection.isolation_level = None
+            event.listen(cls.connection, "begin", lambda conn: conn.exec_driver_sql("BEGIN"))
+        cls.transaction = cls.connection.begin()
+        cls.app_session = db.session
+        db.session = scoped_session(
+            sessionmaker(bind=cls.connection, join_transaction_mode="create_savepoint")
+        )
+        # clean up the other tests
+        if cls.connection.dialect.name == "postgresql":
+            db.session.execute(text(f"TRUNCATE {Product.__tablename__} RESTART IDENTITY CASCADE"))
+        else:
+            db.session.query(Product).delete()
+        db.session.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Run once after all tests"""
+        db.session.close()
+        db.session = cls.app_session
+        cls.transaction.rollback()
+        cls.connection.close()
+
+    def setUp(self):
+        """Runs before each test"""
+        self.savepoint = self.connection.begin_nested()
+
+    def tearDown(self):
+        """Runs after each test"""
+        db.session.remove()
+        self.savepoint.rollback()
@@ -0,0 +1,120 @@
+"""
+Test cases for the Product Cache
+"""
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+import redis
+from service import app
+from service.cache import ProductCache, VERSION_TTL
+
+
+class TestProductCache(TestCase):
+    """Test Cases for the Product Cache"""
+
+    def setUp(self):
+        self.cache = ProductCache()
+
+    def test_local_cache(self):
+        """It should serve Products from the in-process cache"""
+        self.cache.set(1, b'{"id": 1}', self.cache.version(1))
+        self.assertEqual(self.cache.get(1), b'{"id": 1}')
+        self.assertIsNone(self.cache.get(2))
+        self.cache.delete(1)
+        self.assertIsNone(self.cache.get(1))
+
+    def test_local_cache_is_bounded(self):
+        """It should evict the oldest Products from the in-process cache"""
+        self.cache.local_size = 2
+        for product_id in range(3):
+            self.cache.set(product_id, b"{}", self.cache.version(product_id))
+        self.assertIsNone(self.cache.get(0))
+        self.assertEqual(self.cache.get(2), b"{}")
+
+    def test_local_cache_expires(self):
+        """It should not serve expired Products from the in-process cache"""
+        self.cache.local_ttl = -1
+        self.cache.set(1, b"{}", self.cache.version(1))
+        self.assertIsNone(self.cache.get(1))
+
+    def test_local_cache_skips_stale_set(self):
+        """It should not store a Product read before it was invalidated"""
+        version = self.cache.version(1)
+        self.cache.delete(1)
+        self.cache.set(1, b"old", version)
+        self.assertIsNone(self.cache.get(1))
+
+    @patch("service.cache.redis.Redis.from_url")
+    def test_redis_cache(self, from_url_mock):
+        """It should read through and invalidate Redis"""
+        redis_mock = MagicMock()
+        from_url_mock.return_value = redis_mock
+        with patch.dict(app.config, {"REDIS_URI": "redis://localhost:6379/0"}):
+            self.cache.init_app(app)
+        redis_mock.mget.return_value = [b"{}", b"1"]
+        self.assertEqual(self.cache.get(1), b"{}")
+        redis_mock.mget.assert_called_once_with("product:1", "product:1:v")
+        pipe = redis_mock.pipeline.return_value.__enter__.return_value
+        redis_mock.get.return_value = pipe.get.return_value = b"1"
+        self.cache.set(2, b"[]", self.cache.version(2))
+        pipe.watch.assert_called_once_with("product:2:v")
+        pipe.setex.assert_called_once_with("product:2", self.cache.ttl, b"[]")
+        self.cache.delete(2)
+        pipe.incr.assert_called_once_with("product:2:v")
+        pipe.expire.assert_called_once_with("product:2:v", VERSION_TTL)
+        pipe.delete.assert_called_once_with("product:2")
+
+    @patch("service.cache.redis.Redis.from_url")
+    def test_redis_checks_local_version(self, from_url_mock):
+        """It should not serve a Product from L1 after another worker changed it"""
+        redis_mock = MagicMock()
+        from_url_mock.return_value = redis_mock
+        with patch.dict(app.config, {"REDIS_URI": "redis://localhost:6379/0"}):
+            self.cache.init_app(app)
+        redis_mock.mget.return_value = [b"old", b"1"]
+        self.assertEqual(self.cache.get(1), b"old")
+        # an L1 hit only reads the version
+        redis_mock.get.return_value = b"1"
+        self.assertEqual(self.cache.get(1), b"old")
+        redis_mock.get.assert_called_once_with("product:1:v")
+        self.assertEqual(redis_mock.mget.call_count, 1)
+        # another worker deleted it
+        redis_mock.get.return_value = b"2"
+        redis_mock.mget.return_value = [None, b"2"]
+        self.assertIsNone(self.cache.get(1))
+
+    @patch("service.cache.redis.Redis.from_url")
+    def test_redis_skips_stale_set(self, from_url_mock):
+        """It should not store a Product in Redis after its version changed"""
+        redis_mock = MagicMock()
+        from_url_mock.return_value = redis_mock
+        with patch.dict(app.config, {"REDIS_URI": "redis://localhost:6379/0"}):
+            self.cache.init_app(app)
+        pipe = redis_mock.pipeline.return_value.__enter__.return_value
+        redis_mock.get.return_value = b"1"
+        version = self.cache.version(1)
+        # a concurrent write bumped the version before set()
+        pipe.get.return_value = b"2"
+        self.cache.set(1, b"old", version)
+        pipe.setex.assert_not_called()
+        # or between the check and the transaction
+        pipe.get.return_value = b"1"
+        pipe.execute.side_effect = redis.WatchError()
+        self.cache.set(1, b"old", version)
+        redis_mock.mget.return_value = [None, b"2"]
+        self.assertIsNone(self.cache.get(1))
+
+    @patch("service.cache.redis.Redis.from_url")
+    def test_redis_unavailable(self, from_url_mock):
+        """It should fall back to the database when Redis is down"""
+        redis_mock = MagicMock()
+        redis_mock.get.side_effect = redis.ConnectionError("down")
+        redis_mock.mget.side_effect = redis.ConnectionError("down")
+        redis_mock.pipeline.side_effect = redis.ConnectionError("down")
+        from_url_mock.return_value = redis_mock
+        with patch.dict(app.config, {"REDIS_URI": "redis://localhost:6379/0"}):
+            self.cache.init_app(app)
+        self.assertIsNone(self.cache.get(1))
+        self.assertIsNone(self.cache.version(1))
+        self.cache.set(1, b"{}", None)
+        self.cache.delete(1)
+        self.assertIsNone(self.cache.get(1))
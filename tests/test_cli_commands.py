@@ -5,7 +5,7 @@ import os
 from unittest import TestCase
 from unittest.mock import patch, MagicMock
 from click.testing import CliRunner
-from service.common.cli_commands import db_create
+from service.common.cli_commands import db_create, db_create_indexes
 
 
 class TestFlaskCLI(TestCase):
@@ -21,3 +21,13 @@ class TestFlaskCLI(TestCase):
         with patch.dict(os.environ, {"FLASK_APP": "service:app"}, clear=True):
             result = self.runner.invoke(db_create)
             self.assertEqual(result.exit_code, 0)
+
+    @patch('service.common.cli_commands.db')
+    def test_db_create_indexes(self, db_mock):
+        """It should create the missing indexes without dropping tables"""
+        with patch.dict(os.environ, {"FLASK_APP": "service:app"}, clear=True):
+            with patch("sqlalchemy.Index.create") as create_mock:
+                result = self.runner.invoke(db_create_indexes)
+            self.assertEqual(result.exit_code, 0)
+            create_mock.assert_any_call(db_mock.engine, checkfirst=True)
+            db_mock.drop_all.assert_not_called()
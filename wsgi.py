@@ -0,0 +1,28 @@
+"""
+WSGI entry point for running the service on gevent
+
+The database driver is patched before the service is imported so that
+requests waiting on PostgreSQL yield to other greenlets instead of
+blocking the worker.
+
+Run it with gunicorn:
+    gunicorn --worker-class=gevent wsgi:app
+or stand alone:
+    python wsgi.py
+"""
+# pylint: disable=wrong-import-position, wrong-import-order, ungrouped-imports
+from gevent import monkey
+
+monkey.patch_all()
+
+from psycogreen.gevent import patch_psycopg  # noqa: E402
+
+patch_psycopg()
+
+import os  # noqa: E402
+from gevent.pywsgi import WSGIServer  # noqa: E402
+from service import app  # noqa: E402, F401
+
+if __name__ == "__main__":
+    port = int(os.getenv("PORT", "8080"))
+    WSGIServer(("0.0.0.0", port), app).serve_forever()